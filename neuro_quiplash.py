@@ -5,31 +5,41 @@ This module implements Neuro integration for Quiplash 2 using Selenium
 (web browser automation), the Trio async library, and the Neuro API.
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, ElementNotInteractableException, NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from __future__ import annotations
 
 import os
-import sys
+import argparse
+import functools
+import tempfile
 import traceback
 import logging
-from typing import Optional, Callable, Tuple, Any, Coroutine
+from typing import TYPE_CHECKING, Optional, Callable, Tuple, Any, Awaitable, Coroutine, Dict, List, Set, TypedDict
 
 import trio
+import fastjsonschema
+from exceptiongroup import BaseExceptionGroup  # The builtin on Python 3.11+, the backport before
 from libcomponent.component import Event, ExternalRaiseManager
 
 from neuro_api.command import Action
 from neuro_api.event import NeuroAPIComponent
 from neuro_api.api import NeuroAction
 
-import json
+# The exception classes are cheap to import and are needed on every poll, but the rest of
+# Selenium takes a while to import, so it is only imported where the browser is used, once
+# the Neuro API connection and the setup prompts have succeeded
+from selenium.common.exceptions import (
+    TimeoutException, ElementNotInteractableException, NoSuchElementException, JavascriptException,
+    WebDriverException,
+)
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.remote.webelement import WebElement
 
-# For compatibility with Python versions below 3.11, use the backported ExceptionGroup
-if sys.version_info < (3, 11):
-    from exceptiongroup import ExceptionGroup
+# Use orjson to decode action data if it's installed, otherwise fall back to the standard library
+try:
+    import orjson as json
+except ImportError:
+    import json
 
 # Define configuration constants
 MAX_NAME_LENGTH = 12
@@ -37,10 +47,58 @@ MAX_ANSWER_LENGTH = 45
 BASE_URL = "https://jackbox.tv/"
 WEBSOCKET_ENV_VAR = "NEURO_SDK_WS_URL"
 WEBDRIVER_TIMEOUT = 10
-PAUSE_TIME = 1
-WEBSOCKET_CONNECTION_WAIT_TIME = 0.05
-ANSWER_WAIT = 0.1
+POLL_FREQUENCY = 0.1
+MIN_PHASE_POLL_INTERVAL = 0.05
+MAX_PHASE_POLL_INTERVAL = 0.5
+WEBSOCKET_CONNECTION_TIMEOUT = 5
 ROOMCODE_LENGTH = 4
+CHROME_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "neuro-quiplash-profile")
+REMOTE_DEBUGGING_PORT = 9222
+
+# JSON schemas for each action's data, shared by the registered actions and their validators
+NAME_SCHEMA = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": { "type": "string", "minLength": 1, "maxLength": MAX_NAME_LENGTH }
+    }
+}
+ANSWER_SCHEMA = {
+    "type": "object",
+    "required": ["answer"],
+    "properties": {
+        "answer": { "type": "string", "minLength": 1, "maxLength": MAX_ANSWER_LENGTH }
+    }
+}
+VOTE_SCHEMA = {
+    "type": "object",
+    "required": ["vote"],
+    "properties": {
+        "vote": { "type": "integer" }
+    }
+}
+
+# Compile each schema into a validator once at import
+VALIDATE_NAME = fastjsonschema.compile(NAME_SCHEMA)
+VALIDATE_ANSWER = fastjsonschema.compile(ANSWER_SCHEMA)
+VALIDATE_VOTE = fastjsonschema.compile(VOTE_SCHEMA)
+
+# Actions Neuro can take. They are built once and registered once at startup.
+SET_NAME_ACTION = Action(
+    "set_name",
+    f"Sets your name. Cannot be longer than {MAX_NAME_LENGTH} characters.",
+    NAME_SCHEMA,
+)
+RESPOND_ACTION = Action(
+    "respond",
+    f"Responds with your answer to the prompt. Cannot be longer than {MAX_ANSWER_LENGTH} characters.",
+    ANSWER_SCHEMA,
+)
+CAST_VOTE_ACTION = Action(
+    "cast_vote",
+    "Votes for the best answer to the prompt. Provide the index of your favorite answer.",
+    VOTE_SCHEMA,
+)
 
 # Configure logging for this module
 logging.basicConfig(
@@ -49,18 +107,238 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Panel IDs of the game phases the integration reacts to
+ANSWER_PANEL_ID = "state-answer-question"
+VOTE_PANEL_ID = "state-vote"
+
+# IDs of the elements the join phase interacts with
+ROOMCODE_INPUT_ID = "roomcode"
+USERNAME_INPUT_ID = "username"
+JOIN_BUTTON_ID = "button-join"
+
+VOTE_WAIT_TEXT = "Wait for the other players!"
+
+# Installs a MutationObserver on the page body that queues the ID of a game panel whenever it
+# becomes active, is (re-)rendered, or its contents change while active. Also defines the
+# window.__panel(id), window.__isActive(id) and window.__readPanel(id) helpers shared by the
+# other scripts. Panel elements are cached, and looked up again once the page replaces them.
+INSTALL_PHASE_OBSERVER_JS = """
+const panelIds = arguments[0];
+const panelSelector = panelIds.map(id => `#${id}`).join(", ");
+
+// Replace any observer installed earlier
+window.__phaseObserver?.observer.disconnect();
+
+const panelCache = new Map();
+window.__panel = id => {
+    let panel = panelCache.get(id);
+    if (!panel?.isConnected) {
+        panel = document.getElementById(id);
+        panelCache.set(id, panel);
+    }
+    return panel;
+};
+window.__isActive = id => {
+    const panel = window.__panel(id);
+    return panel != null && !panel.classList.contains("pt-page-off");
+};
+
+// Reads everything the answer and vote phases need from a panel, collecting every field
+// in one traversal of the panel
+window.__readPanel = id => {
+    if (!window.__isActive(id)) return {id, active: false};
+
+    const phase = {id, active: true, question: "", vote_text: "", answers: []};
+    for (const element of window.__panel(id).querySelectorAll("#question-text, #vote-text, .quiplash2-vote-button")) {
+        if (element.id === "question-text") phase.question = element.innerText;
+        else if (element.id === "vote-text") phase.vote_text = element.innerText;
+        else phase.answers.push(element.innerText);
+    }
+    return phase;
+};
+
+const queue = [];
+const push = id => {
+    if (window.__isActive(id) && queue[queue.length - 1] !== id) {
+        queue.push(id);
+    }
+};
+const observer = new MutationObserver(mutations => {
+    for (const mutation of mutations) {
+        // Changes on or inside a panel
+        const target = mutation.target.nodeType === Node.ELEMENT_NODE ? mutation.target : mutation.target.parentElement;
+        const panel = target?.closest(panelSelector);
+        if (panel) push(panel.id);
+
+        // Panels rendered as part of a larger subtree, found with one query per added node
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType !== Node.ELEMENT_NODE) continue;
+            if (node.matches(panelSelector)) push(node.id);
+            for (const panel of node.querySelectorAll(panelSelector)) push(panel.id);
+        }
+    }
+});
+observer.observe(document.body, {
+    attributes: true, attributeFilter: ["class"], childList: true, characterData: true, subtree: true
+});
+for (const id of panelIds) push(id);
+
+window.__phaseObserver = {observer, queue};
+"""
+
+# Drains the queued panel events and reads the panel in the same round-trip. Only the most recent
+# event is kept, since the transition that queued it superseded the earlier ones. Returns a list
+# with that panel's data (empty if nothing was queued), or null if the observer is not installed.
+DRAIN_PHASE_QUEUE_JS = """
+const phaseObserver = window.__phaseObserver;
+if (!phaseObserver) return null;
+const ids = phaseObserver.queue.splice(0, phaseObserver.queue.length);
+return ids.length === 0 ? [] : [window.__readPanel(ids[ids.length - 1])];
+"""
+
+# The drain script as a standalone expression, for evaluating it through CDP instead of WebDriver
+DRAIN_PHASE_QUEUE_EXPRESSION = f"(() => {{{DRAIN_PHASE_QUEUE_JS}}})()"
+
+# Reads everything the answer and vote phases need from a game panel in a single round-trip
+READ_PANEL_JS = """
+return window.__readPanel(arguments[0]);
+"""
+
+# Fills in and submits the answer form of a panel in a single round-trip, setting the value the
+# same way as SET_INPUT_VALUE_JS. The form is looked up at submit time, so no WebElement
+# references are held (and can go stale) while Neuro thinks.
+# Returns true once the answer is submitted, or null while the form isn't rendered or the submit
+# button can't be clicked yet. If the input didn't keep the value, returns the input and submit
+# button instead so the answer can be typed.
+SUBMIT_ANSWER_JS = """
+const [panelId, value] = arguments;
+const panel = window.__panel(panelId);
+const input = panel?.querySelector("#quiplash-answer-input");
+const submit = panel?.querySelector("#quiplash-submit-answer");
+if (!input || !submit || !window.__isActive(panelId)) return null;
+
+Object.getOwnPropertyDescriptor(Object.getPrototypeOf(input), "value").set.call(input, value);
+input.dispatchEvent(new Event("input", {bubbles: true}));
+input.dispatchEvent(new Event("change", {bubbles: true}));
+if (input.value !== value) return [input, submit];
+
+if (submit.disabled || submit.getClientRects().length === 0) return null;
+submit.click();
+return true;
+"""
+
+# Sets an input's value and fires the events the page listens for, in a single round-trip.
+# The native value setter is used so the page's framework registers the change.
+# Returns whether the input kept the value, i.e. the page didn't reset or rewrite it.
+SET_INPUT_VALUE_JS = """
+const [input, value] = arguments;
+Object.getOwnPropertyDescriptor(Object.getPrototypeOf(input), "value").set.call(input, value);
+input.dispatchEvent(new Event("input", {bubbles: true}));
+input.dispatchEvent(new Event("change", {bubbles: true}));
+return input.value === value;
+"""
+
+# Clicks the vote button at the given index of a panel. The buttons are looked up at click time,
+# so no WebElement references are held (and can go stale) while Neuro decides.
+# Returns false if the button is gone, e.g. because voting ended before Neuro decided.
+CLICK_VOTE_BUTTON_JS = """
+const [panelId, index] = arguments;
+const button = window.__panel(panelId)?.querySelectorAll(".quiplash2-vote-button")[index];
+if (!button) return false;
+button.click();
+return true;
+"""
+
+class QuiplashNeuroAPIComponent(NeuroAPIComponent):
+    """Neuro API component that signals when its websocket connection attempt has finished."""
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.connect_attempted = trio.Event()  # Set once the connection either succeeds or fails
+
+    async def websocket_connect_successful(self) -> None:
+        self.connect_attempted.set()
+        await super().websocket_connect_successful()
+
+    async def handle_connect(self, event: Event[str]) -> None:
+        # Returns once a failed attempt is handled or an established connection closes
+        try:
+            await super().handle_connect(event)
+        finally:
+            self.connect_attempted.set()
+
+class PanelState(TypedDict):
+    id: str  # ID of the game panel
+    active: bool  # Whether the panel is the one currently shown
+
+class PhaseData(PanelState, total=False):
+    """Game panel data read by window.__readPanel. The other fields are only set for an active panel."""
+    question: str
+    vote_text: str
+    answers: List[str]
+
+class ForcedAction:
+    """An action Neuro was forced to take, and the value she replied with once it arrives."""
+    def __init__(self, key: str):
+        self.key = key  # What the action was forced for, e.g. the prompt being answered
+        self.value: Any = None
+        self.dropped = False  # Whether the request was dropped before it reached Neuro
+        self.received = trio.Event()  # Set once Neuro replied or the request was dropped
+
 class GameState:
     """Encapsulate all game state variables and provide methods for state management."""
     def __init__(self):
-        self.username: Optional[str] = None  # Player's chosen name
-        self.response: Optional[str] = None  # Player's submitted answer
-        self.vote: int = -1  # The index corresponding to the player's vote
-        self.vote_option_count: int = 0  # How many answer options are available for voting
-        self.played = trio.Event()  # Event to signal when an action (name setting, answer, vote) is complete
-
-    def reset_played(self) -> None:
-        """Reset the 'played' event so it can be used for the next game action."""
-        self.played = trio.Event()
+        self.vote_option_count: int = 0  # How many answer options the forced vote has
+        self.answers: Dict[str, str] = {}  # Neuro's answer to each prompt, kept in case submitting it has to be retried
+        self.submitted_prompts: Set[str] = set()  # Prompts whose answer was submitted in the browser
+        self.voted_matchups: Set[str] = set()  # Matchups whose vote was clicked in the browser
+        # The forced request of each action that Neuro hasn't replied to yet, by action name.
+        # These outlive the phase handler that sent them, so a late reply is still matched to
+        # the request it answers.
+        self.forced_actions: Dict[str, ForcedAction] = {}
+
+    async def request_action(self, action_name: str, key: str, force: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Force an action by calling force(), then wait for Neuro's reply and return its value.
+
+        The request is tagged with key. If a request with the same key is still unanswered, e.g.
+        because the handler that sent it was cancelled, that request is waited on instead of
+        forcing the action again. An unanswered request with a different key is waited out first,
+        so Neuro's reply to it can't be taken as the reply to this one.
+        """
+        while True:
+            pending = self.forced_actions.get(action_name)
+            if pending is None:
+                pending = ForcedAction(key)
+                self.forced_actions[action_name] = pending
+                try:
+                    await force()
+                except BaseException:
+                    # Don't leave behind a request Neuro may never have received, and wake
+                    # anything waiting on it so it checks again
+                    if self.forced_actions.get(action_name) is pending:
+                        del self.forced_actions[action_name]
+                    if not pending.received.is_set():
+                        pending.dropped = True
+                        pending.received.set()
+                    raise
+
+            await pending.received.wait()
+            if pending.key == key and not pending.dropped:
+                return pending.value
+            # Either an earlier request was waited out or this one was dropped, so check again
+
+    def submit_action(self, action_name: str, value: Any) -> Optional[str]:
+        """
+        Pass a validated action value to the forced request of that action.
+
+        Returns the key of the request it answered, or None if no request is waiting for the action.
+        """
+        pending = self.forced_actions.pop(action_name, None)
+        if pending is None:
+            return None
+        pending.value = value
+        pending.received.set()
+        return pending.key
 
 def handle_json(
     action_function: Callable[[dict, GameState], Coroutine[Any, Any, Tuple[bool, Optional[str]]]]
@@ -68,7 +346,8 @@ def handle_json(
     """
     Decorator that parses JSON data from the NeuroAction and calls the specified action function.
     
-    It handles JSON decoding errors and unexpected exceptions, returning appropriate error messages.
+    It handles JSON decoding errors, schema validation errors and unexpected exceptions, returning
+    appropriate error messages.
     """
     async def wrapper(action: NeuroAction, state: GameState) -> Tuple[bool, Optional[str]]:
         try:
@@ -77,21 +356,60 @@ def handle_json(
             return await action_function(data, state)
         except json.JSONDecodeError as e:
             return False, f"Invalid JSON: {str(e)}"
+        except fastjsonschema.JsonSchemaValueException as e:
+            return False, f"Invalid data: {e.message}"
         except Exception as e:
             return False, f"Unexpected error: {str(e)}"
     return wrapper
 
-def configure_webdriver() -> webdriver.Chrome:
+# WebDriver isn't thread-safe, so at most one blocking WebDriver call runs at a time
+WEBDRIVER_LIMITER = trio.CapacityLimiter(1)
+
+async def run_webdriver(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking WebDriver call in a worker thread and return its result.
+
+    This keeps the Trio event loop, and with it the Neuro API connection, responsive while the
+    browser is busy. Calls are serialized through WEBDRIVER_LIMITER.
+    """
+    return await trio.to_thread.run_sync(function, *args, limiter=WEBDRIVER_LIMITER)
+
+def configure_webdriver(attach: bool = False) -> webdriver.Chrome:
     """
     Configure and return a Chrome WebDriver with customized options.
     
-    The function sets Chrome options for headless mode, disables sandbox/GPU usage, and 
-    adds experimental options to evade automation detection.
+    The function sets Chrome options for headless mode, disables sandbox/GPU usage, reuses a
+    persistent profile between runs, and adds experimental options to evade automation detection.
+    If attach is True, it instead connects to an already running Chrome that was started with
+    --remote-debugging-port, which skips the browser startup.
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
+    if attach:
+        chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{REMOTE_DEBUGGING_PORT}")
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.implicitly_wait(0)
+        return driver
+
     chrome_options.add_argument("--headless=new")  # Runs Chrome in headless mode (no GUI).
     chrome_options.add_argument("--no-sandbox")      # Disables the sandbox mode for compatibility.
     chrome_options.add_argument("--disable-gpu")       # Disables GPU hardware acceleration.
+    chrome_options.add_argument("--disable-dev-shm-usage")  # Avoids crashes when /dev/shm is small.
+    chrome_options.add_argument("--disable-extensions")     # Skips loading browser extensions.
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")  # Skips image decoding.
+    chrome_options.add_argument("--disable-background-networking")  # Stops background update/telemetry requests.
+    chrome_options.add_argument("--disable-features=TranslateUI,BackForwardCache")
+
+    # Block images and notification prompts entirely, since only text is read and buttons clicked.
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+
+    # Reuse the same profile between runs so the site's cached assets survive restarts.
+    chrome_options.add_argument(f"--user-data-dir={CHROME_PROFILE_DIR}")
     
     # Evasion parameters to make the automated browser less detectable.
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
@@ -101,7 +419,109 @@ def configure_webdriver() -> webdriver.Chrome:
     # Set browser window size and mimic a common user-agent.
     chrome_options.add_argument("--window-size=1920,1080")
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    return webdriver.Chrome(options=chrome_options)
+    driver = webdriver.Chrome(options=chrome_options)
+    # Element lookups should fail immediately; anything that needs to wait uses wait_until.
+    driver.implicitly_wait(0)
+    return driver
+
+def close_webdriver(driver: webdriver.Chrome, attach: bool = False) -> None:
+    """Close the WebDriver, leaving the browser running if it was attached to rather than launched."""
+    if attach:
+        driver.service.stop()
+    else:
+        driver.quit()
+
+async def wait_until(driver: webdriver.Chrome, condition: Callable[[webdriver.Chrome], Any]) -> Any:
+    """
+    Wait until a condition returns a truthy value and return it, like WebDriverWait.until.
+
+    Each check is a separate WebDriver call, so other tasks can use the driver between checks
+    and the wait can be cancelled. Like WebDriverWait, missing elements count as the condition
+    not being met yet. Raises TimeoutException after WEBDRIVER_TIMEOUT seconds.
+    """
+    with trio.move_on_after(WEBDRIVER_TIMEOUT):
+        while True:
+            try:
+                result = await run_webdriver(condition, driver)
+                if result:
+                    return result
+            except NoSuchElementException:
+                pass
+            await trio.sleep(POLL_FREQUENCY)
+    raise TimeoutException(f"Condition not met after {WEBDRIVER_TIMEOUT} seconds")
+
+async def fill_input(driver: webdriver.Chrome, element: WebElement, value: str) -> None:
+    """
+    Set the value of an input element.
+
+    The value is set with a single script call; if the page didn't keep it, the value is typed
+    in with real key events instead.
+    """
+    if not await run_webdriver(driver.execute_script, SET_INPUT_VALUE_JS, element, value):
+        await run_webdriver(element.clear)
+        await run_webdriver(element.send_keys, value)
+
+def answer_phase_settled(phase: PhaseData) -> bool:
+    """Return whether the answer phase data is final: the question has rendered or the panel is no longer active."""
+    return not phase["active"] or bool(phase["question"])
+
+def vote_phase_settled(phase: PhaseData) -> bool:
+    """
+    Return whether the voting phase data is final: the answer options or the waiting message have
+    rendered, or the panel is no longer active.
+    """
+    return not phase["active"] or phase["vote_text"] == VOTE_WAIT_TEXT or bool(phase["answers"])
+
+def same_phase(handled: PhaseData, phase: PhaseData) -> bool:
+    """
+    Return whether newly read phase data belongs to the phase a running handler was started with.
+
+    A handler started before its phase settled waits for it to settle itself (and then updates the
+    phase it was started with), so data read by the observer in the meantime is the same phase. Otherwise the phase is the same as long as the
+    panel is still showing the same prompt (and, for voting, the same answers).
+    """
+    if phase["id"] != handled["id"]:
+        return False
+    settled = answer_phase_settled if handled["id"] == ANSWER_PANEL_ID else vote_phase_settled
+    if not settled(handled):
+        return True
+    if not phase["active"] or phase.get("question") != handled.get("question"):
+        return False
+    return handled["id"] == ANSWER_PANEL_ID or (
+        phase.get("answers") == handled.get("answers") and phase.get("vote_text") == handled.get("vote_text")
+    )
+
+def drain_phase_queue(driver: webdriver.Chrome) -> Optional[List[PhaseData]]:
+    """
+    Drain the phase observer's queue, returning the result of DRAIN_PHASE_QUEUE_JS.
+
+    This runs on every poll of the main loop, so the script is evaluated directly with the
+    Chrome DevTools Protocol, which skips the argument and element handling of execute_script.
+    """
+    response = driver.execute_cdp_cmd(
+        "Runtime.evaluate", {"expression": DRAIN_PHASE_QUEUE_EXPRESSION, "returnByValue": True}
+    )
+    if "exceptionDetails" in response:
+        details = response["exceptionDetails"]
+        raise JavascriptException(details.get("exception", {}).get("description", details.get("text")))
+    return response["result"].get("value")
+
+def answer_phase_loaded(driver: webdriver.Chrome) -> Optional[PhaseData]:
+    """Wait condition for the answer phase. Returns the answer phase data once it has settled."""
+    phase = driver.execute_script(READ_PANEL_JS, ANSWER_PANEL_ID)
+    return phase if answer_phase_settled(phase) else None
+
+def answer_submitted(driver: webdriver.Chrome, answer: str) -> Any:
+    """
+    Wait condition for submitting an answer. Returns True once the answer is submitted, or the
+    answer input and submit button if the answer has to be typed in instead.
+    """
+    return driver.execute_script(SUBMIT_ANSWER_JS, ANSWER_PANEL_ID, answer)
+
+def vote_phase_loaded(driver: webdriver.Chrome) -> Optional[PhaseData]:
+    """Wait condition for the voting phase. Returns the voting phase data once it has settled."""
+    phase = driver.execute_script(READ_PANEL_JS, VOTE_PANEL_ID)
+    return phase if vote_phase_settled(phase) else None
 
 async def handle_join_phase(driver: webdriver.Chrome, roomcode: str, username: str) -> bool:
     """
@@ -110,172 +530,144 @@ async def handle_join_phase(driver: webdriver.Chrome, roomcode: str, username: s
     This function waits for the room code and username input fields to become available,
     then inputs the data and clicks the join button. Returns True if successful.
     """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         # Wait for and fill in the room code input
-        roomcode_box = WebDriverWait(driver, WEBDRIVER_TIMEOUT).until(
-            EC.presence_of_element_located((By.ID, 'roomcode'))
-        )
-        roomcode_box.send_keys(roomcode)
+        roomcode_box = await wait_until(driver, EC.presence_of_element_located((By.ID, ROOMCODE_INPUT_ID)))
+        await fill_input(driver, roomcode_box, roomcode)
 
         # Wait for and fill in the username input
-        name_box = WebDriverWait(driver, WEBDRIVER_TIMEOUT).until(
-            EC.presence_of_element_located((By.ID, 'username'))
-        )
-        name_box.send_keys(username)
+        name_box = await wait_until(driver, EC.presence_of_element_located((By.ID, USERNAME_INPUT_ID)))
+        await fill_input(driver, name_box, username)
 
         # Wait until the join button is clickable and click it
-        play_button = WebDriverWait(driver, WEBDRIVER_TIMEOUT).until(
-            EC.element_to_be_clickable((By.ID, 'button-join'))
-        )
-        play_button.click()
+        play_button = await wait_until(driver, EC.element_to_be_clickable((By.ID, JOIN_BUTTON_ID)))
+        await run_webdriver(play_button.click)
 
         return True
-    except Exception as e:
-        logger.error(f"Join phase failed: {str(e)}")
+    except WebDriverException as e:
+        logger.error("Join phase failed: %s", e)
         return False
 
-async def handle_answer_phase(driver: webdriver.Chrome, neuro_component: NeuroAPIComponent, state: GameState) -> bool:
+async def handle_answer_phase(
+    driver: webdriver.Chrome, neuro_component: NeuroAPIComponent, state: GameState, phase: PhaseData
+) -> bool:
     """
     Handle the question answering phase of the game.
     
-    This function waits for the game to present a question, registers an action for answer
-    submission via Neuro API, and submits the answer in the browser.
+    This function is called with the answer page data read by the phase observer when the page
+    is reported as active. It forces the answer action via Neuro API, and submits the answer in
+    the browser.
     Returns True if the process is successful.
     """
     try:
-        state_answer_question = driver.find_element(By.ID, "state-answer-question")
+        # Only go back to the browser if the question hadn't rendered when the page was read.
+        # The phase is updated in place, so the main loop compares later reads of the page
+        # against the settled data.
+        if not answer_phase_settled(phase):
+            phase.update(await wait_until(driver, answer_phase_loaded))
+
+        # The panel may have been deactivated since the observer reported it
+        if not phase["active"]:
+            return False
+        question = phase["question"]
 
-        # Check if the answer page is active by inspecting its class attribute
-        if "pt-page-off" not in state_answer_question.get_attribute("class"):
-            await trio.sleep(ANSWER_WAIT)
-            question = state_answer_question.find_element(By.ID, "question-text").text
+        # The observer reports every change on the answer page, so skip prompts already answered
+        if question in state.submitted_prompts:
+            return False
 
-            # Register a temporary action for answer submission over Neuro API
-            await neuro_component.register_temporary_actions(
-                (
-                    (
-                        Action(
-                            "respond",
-                            f"Responds with your answer to the prompt. Cannot be longer than {MAX_ANSWER_LENGTH} characters.",
-                            {
-                                "type": "object",
-                                "required": ["answer"],
-                                "properties": {
-                                    "answer": { "type": "string" }
-                                }
-                            },
-                        ),
-                        lambda action_data: answer_action(action_data, state),
-                    ),
+        # Reuse Neuro's answer if submitting it failed before, instead of asking for another one
+        response = state.answers.get(question)
+
+        if response is None:
+            # Instruct the client to provide an answer using the Neuro API, and wait until
+            # the answer is received
+            response = await state.request_action(
+                RESPOND_ACTION.name,
+                question,
+                functools.partial(
+                    neuro_component.send_force_action,
+                    f"Prompt: {question}",
+                    "Write a response to the given prompt.",
+                    [RESPOND_ACTION.name],
                 ),
             )
-            # Instruct the client to provide an answer using the Neuro API
-            await neuro_component.send_force_action(
-                f"Prompt: {question}",
-                "Write a response to the given prompt.",
-                ["respond"],
-            )
-
-            # Wait until the player's answer (via Neuro API) is received
-            await state.played.wait()
-            state.reset_played()
-
-            # Input the submitted answer in the browser and click the submit button
-            answer_box = WebDriverWait(state_answer_question, WEBDRIVER_TIMEOUT).until(
-                EC.presence_of_element_located((By.ID, "quiplash-answer-input"))
-            )
-            answer_box.send_keys(state.response)
-
-            submit_button = WebDriverWait(state_answer_question, WEBDRIVER_TIMEOUT).until(
-                EC.element_to_be_clickable((By.ID, "quiplash-submit-answer"))
-            )
-            submit_button.click()
 
-            return True
-        else:
-            return False
+        # Input the submitted answer in the browser and click the submit button, once the form
+        # can be submitted
+        result = await wait_until(driver, functools.partial(answer_submitted, answer=response))
+        if result is not True:
+            # The page didn't keep the scripted value, so type the answer in instead
+            answer_box, submit_button = result
+            await run_webdriver(answer_box.clear)
+            await run_webdriver(answer_box.send_keys, response)
+            await run_webdriver(submit_button.click)
+
+        state.submitted_prompts.add(question)
+        return True
     except (NoSuchElementException, TimeoutException, ElementNotInteractableException):
         return False
-    except Exception as e:
-        logger.error(f"Answer handling failed: {str(e)}")
+    except WebDriverException as e:
+        logger.error("Answer handling failed: %s", e)
         return False
 
-async def handle_voting_phase(driver: webdriver.Chrome, neuro_component: NeuroAPIComponent, state: GameState):
+async def handle_voting_phase(
+    driver: webdriver.Chrome, neuro_component: NeuroAPIComponent, state: GameState, phase: PhaseData
+) -> bool:
     """
     Handle the voting phase of the game.
     
-    This phase allows the player to vote for the best answer. The function registers an action
-    for voting via the Neuro API, waits for the vote input, and then clicks the corresponding
-    vote button.
+    This function is called with the voting page data read by the phase observer when the page
+    is reported as active. It allows the player to vote for the best answer by forcing the vote
+    action via the Neuro API, waiting for the vote input, and then clicking the corresponding vote
+    button.
     Returns True if the voting action is handled successfully.
     """
     try:
-        state_vote = driver.find_element(By.ID, "state-vote")
+        # Only go back to the browser if the vote options hadn't rendered when the page was read.
+        # The phase is updated in place, so the main loop compares later reads of the page
+        # against the settled data.
+        if not vote_phase_settled(phase):
+            phase.update(await wait_until(driver, vote_phase_loaded))
+
+        # Proceed only if the panel is still active and not in a waiting state
+        if not phase["active"] or phase["vote_text"] == VOTE_WAIT_TEXT:
+            return False
 
-        # Check that the voting phase is active
-        if "pt-page-off" not in state_vote.get_attribute("class"):
-            await trio.sleep(PAUSE_TIME)
-            vote_text = state_vote.find_element(By.ID, "vote-text").text
+        # Prepare a list of answer options for user feedback
+        answers = [f"{i + 1}: {answer}" for i, answer in enumerate(phase["answers"])]
+        answers_str = "\n".join(answers)
+        matchup = f"Prompt: {phase['question']}\nAnswers:\n{answers_str}"
 
-            # Proceed only if not in a waiting state
-            if vote_text != "Wait for the other players!":
-                question_text = state_vote.find_element(By.ID, "question-text").text
+        # The observer reports every change on the voting page, so skip matchups already voted on
+        if matchup in state.voted_matchups:
+            return False
 
-                # Wait until all voting buttons are present
-                vote_buttons = WebDriverWait(state_vote, WEBDRIVER_TIMEOUT).until(
-                    EC.presence_of_all_elements_located((By.CLASS_NAME, "quiplash2-vote-button"))
-                )
+        async def force_vote() -> None:
+            # Votes are validated against the options of the request being made
+            state.vote_option_count = len(answers)
+            await neuro_component.send_force_action(
+                "You're voting on your favorite answer to the prompt.",
+                matchup,
+                [CAST_VOTE_ACTION.name],
+            )
+
+        # Force the vote action via the Neuro API with prompt information, and wait for the
+        # player's vote to be processed
+        vote = await state.request_action(CAST_VOTE_ACTION.name, matchup, force_vote)
 
-                if len(vote_buttons) > 0:
-                    # Prepare a list of answer options for user feedback
-                    answers = [f"{i + 1}: {button.text}" for i, button in enumerate(vote_buttons)]
-                    answers_str = "\n".join(answers)
-
-                    state.vote_option_count = len(answers)
-                    
-                    # Register a temporary action for casting the vote via Neuro API
-                    await neuro_component.register_temporary_actions(
-                        (
-                            (
-                                Action(
-                                    "cast_vote",
-                                    "Votes for the best answer to the prompt. Provide the index of your favorite answer.",
-                                    {
-                                        "type": "object",
-                                        "required": ["vote"],
-                                        "properties": {
-                                            "vote": { "type": "integer" }
-                                        }
-                                    },
-                                ),
-                                lambda action_data: vote_action(action_data, state),
-                            ),
-                        ),
-                    )
-                    # Force the vote action via the Neuro API with prompt information
-                    await neuro_component.send_force_action(
-                        "You're voting on your favorite answer to the prompt.",
-                        f"Prompt: {question_text}\nAnswers:\n{answers_str}",
-                        ["cast_vote"],
-                    )
-
-                    # Wait for the player's vote to be processed
-                    await state.played.wait()
-                    state.reset_played()
-
-                    # Simulate clicking on the vote button corresponding to the player's choice
-                    vote_buttons[state.vote].click()
-                    return True
-                else:
-                    return False
-            else:
-                return False
-        else:
+        # Simulate clicking on the vote button corresponding to the player's choice
+        if not await run_webdriver(driver.execute_script, CLICK_VOTE_BUTTON_JS, VOTE_PANEL_ID, vote):
             return False
+
+        state.voted_matchups.add(matchup)
+        return True
     except (NoSuchElementException, TimeoutException, ElementNotInteractableException):
         return False
-    except Exception as e:
-        logger.error(f"Voting handling failed: {str(e)}")
+    except WebDriverException as e:
+        logger.error("Voting handling failed: %s", e)
         return False
 
 @handle_json
@@ -283,69 +675,80 @@ async def set_name_action(data: dict, state: GameState) -> Tuple[bool, Optional[
     """
     Handle the username setting request.
     
-    Validates the provided name, updates the GameState accordingly, and signals completion.
+    Validates the provided name against NAME_SCHEMA and passes it to the waiting join phase
+    through the GameState.
     Returns a tuple containing a success flag and a message.
     """
-    if "name" not in data:
-        return False, "Data must contain field 'name'."
-    
-    if (len(data["name"]) == 0):
-        return False, "Received blank name. Must enter in a name."
-    elif (len(data["name"]) <= MAX_NAME_LENGTH):
-        state.username = data["name"]
-        state.played.set()  # Signal that username has been set
-        return True, f"{state.username = }"
-    else:
-        return False, f"Received {len(data['name'])} character name. Name cannot exceed {MAX_NAME_LENGTH} characters."
+    VALIDATE_NAME(data)
+
+    # Hand the username to the waiting join phase
+    if state.submit_action(SET_NAME_ACTION.name, data["name"]) is None:
+        return False, "A name isn't being chosen right now."
+    return True, f"name = {data['name']!r}"
 
 @handle_json  
 async def answer_action(data: dict, state: GameState) -> Tuple[bool, Optional[str]]:
     """
     Handle the answer submission request.
     
-    Validates the provided answer, updates GameState with the response, and signals completion.
+    Validates the provided answer against ANSWER_SCHEMA and passes it to the answer phase that forced it
+    through the GameState.
     Returns a tuple with a success flag and a message.
     """
-    if "answer" not in data:
-        return False, "Data must contain field 'answer'."
-    
-    if (len(data["answer"]) == 0):
-        return False, "Received blank answer. Must enter in an answer."
-    elif (len(data["answer"]) <= MAX_ANSWER_LENGTH):
-        state.response = data["answer"]
-        state.played.set()  # Signal that answer has been submitted
-        return True, f"{state.response = }"
-    else:
-        return False, f"Received {len(data['answer'])} answer. Answer cannot exceed {MAX_ANSWER_LENGTH} characters."
+    VALIDATE_ANSWER(data)
+
+    # Hand the answer to the answer phase, filed under the prompt it was forced for in case
+    # that phase has already moved on
+    question = state.submit_action(RESPOND_ACTION.name, data["answer"])
+    if question is None:
+        return False, "No prompt is being answered right now."
+    state.answers[question] = data["answer"]
+    return True, f"answer = {data['answer']!r}"
 
 @handle_json
 async def vote_action(data: dict, state: GameState) -> Tuple[bool, Optional[str]]:
     """
     Handle the voting request.
     
-    Validates the vote number, updates the GameState with the chosen vote (adjusting for 0-based indexing),
-    and signals completion.
+    Validates the vote against VOTE_SCHEMA and the number of answer options, then passes the
+    chosen vote (adjusted for 0-based indexing) to the waiting voting phase through the GameState.
     Returns a tuple with a success flag and a message.
     """
-    if "vote" not in data:
-        return False, "Data must contain field 'vote'."
-    
-    if type(data["vote"]) is not int:
-        return False, "'vote' must be an integer."
-    
-    if data["vote"] <= 0 or data["vote"] > state.vote_option_count:
+    VALIDATE_VOTE(data)
+
+    # Convert to a 0-based index. JSON schema integers include integral floats such as 1.0,
+    # so normalize to int first. (Booleans are already rejected by the schema.)
+    index = int(data["vote"]) - 1
+
+    if not 0 <= index < state.vote_option_count:
         return False, f"Invalid choice. Choices are from 1 to {state.vote_option_count}, inclusive."
-    else:
-        state.vote = data["vote"] - 1  # Convert to 0-based index
-        state.played.set()  # Signal that the vote has been registered
-        return True, f"{state.vote = }"
 
-async def run() -> None:
+    # Hand the vote to the waiting voting phase
+    if state.submit_action(CAST_VOTE_ACTION.name, index) is None:
+        return False, "No vote is being cast right now."
+    return True, f"vote = {index + 1}"
+
+async def read_roomcode() -> Optional[str]:
+    """
+    Prompt the user for the room code and validate it.
+
+    input() blocks, so the prompt runs in a worker thread to keep the Trio event loop (and the
+    Neuro API connection) running while the user types. Returns None if the room code is invalid.
+    """
+    roomcode = await trio.to_thread.run_sync(input, "Enter 4-character room code: ", abandon_on_cancel=True)
+    roomcode = roomcode.strip()
+    if len(roomcode) != ROOMCODE_LENGTH or not roomcode.isalpha():
+        logger.error("Invalid room code")
+        return None
+    return roomcode
+
+async def run(attach: bool = False) -> None:
     """
     Main asynchronous function to run the game.
     
     Establishes connection to the Neuro API; handles joining, answering, and voting phases
-    by orchestrating interactions between Selenium, Trio, and the Neuro API.
+    by orchestrating interactions between Selenium, Trio, and the Neuro API. If attach is True,
+    an already running Chrome is reused instead of launching a new one.
     """
     websocket_url = os.environ.get(WEBSOCKET_ENV_VAR, "ws://localhost:8000")
 
@@ -353,7 +756,7 @@ async def run() -> None:
         # Create a manager for handling asynchronous events
         manager = ExternalRaiseManager("name", nursery)
         # Initialize Neuro API component for game interactions
-        neuro_component = NeuroAPIComponent("neuro_api", "Quiplash 2")
+        neuro_component = QuiplashNeuroAPIComponent("neuro_api", "Quiplash 2")
 
         try:
             # Add the Neuro API component to the manager
@@ -367,7 +770,8 @@ async def run() -> None:
 
             # Attempt to connect to the Neuro API
             await manager.raise_event(Event("connect", websocket_url))
-            await trio.sleep(WEBSOCKET_CONNECTION_WAIT_TIME)
+            with trio.move_on_after(WEBSOCKET_CONNECTION_TIMEOUT):
+                await neuro_component.connect_attempted.wait()
 
             if neuro_component.not_connected:
                 logger.error("Neuro API connection failed")
@@ -375,61 +779,121 @@ async def run() -> None:
             
             await neuro_component.send_startup_command()
 
-            # Get and validate the room code from user input
-            roomcode = input("Enter 4-character room code: ").strip()
-            if len(roomcode) != ROOMCODE_LENGTH or not roomcode.isalpha():
-                logger.error("Invalid room code")
-                return
-
-            # Initialize game state and register temporary action for username setting
+            # Initialize game state and register all actions up front. Setting the name only
+            # happens once, so that action is temporary; the answer and vote actions stay
+            # registered for the whole game and are forced whenever their phase comes up.
             state = GameState()
 
             await neuro_component.register_temporary_actions(
                 (
-                    (
-                        Action(
-                            "set_name",
-                            f"Sets your name. Cannot be longer than {MAX_NAME_LENGTH} characters.",
-                            {
-                                "type": "object",
-                                "required": ["name"],
-                                "properties": {
-                                    "name": { "type": "string" }
-                                }
-                            },
-                        ),
-                        lambda action_data: set_name_action(action_data, state),
-                    ),
+                    (SET_NAME_ACTION, functools.partial(set_name_action, state=state)),
                 ),
             )
-            # Request the user to set their name through Neuro API
-            await neuro_component.send_force_action(
-                "You're starting a game of Quiplash.",
-                "Choose your name.",
-                ["set_name"],
+            await neuro_component.register_neuro_actions(
+                (
+                    (RESPOND_ACTION, functools.partial(answer_action, state=state)),
+                    (CAST_VOTE_ACTION, functools.partial(vote_action, state=state)),
+                ),
             )
+            roomcode: Optional[str] = None
+            username: Optional[str] = None
+
+            # Get the room code from the user while Neuro chooses her name
+            async with trio.open_nursery() as setup_nursery:
+                async def get_roomcode() -> None:
+                    nonlocal roomcode
+                    roomcode = await read_roomcode()
+                    if roomcode is None:
+                        # No point waiting for a name if the game can't be joined
+                        setup_nursery.cancel_scope.cancel()
+
+                setup_nursery.start_soon(get_roomcode)
+
+                # Request the user to set their name through Neuro API, and wait for it to be set
+                username = await state.request_action(
+                    SET_NAME_ACTION.name,
+                    "name",
+                    functools.partial(
+                        neuro_component.send_force_action,
+                        "You're starting a game of Quiplash.",
+                        "Choose your name.",
+                        [SET_NAME_ACTION.name],
+                    ),
+                )
 
-            # Wait for the username to be set and then reset the event for further actions
-            await state.played.wait()
-            state.reset_played()
+            if roomcode is None or username is None:
+                return
 
-            # Launch Selenium WebDriver to control the browser
-            with configure_webdriver() as driver:
-                driver.get(BASE_URL)  # Open the game website
+            # Launch (or attach to) the browser through Selenium WebDriver
+            driver = await run_webdriver(configure_webdriver, attach)
+            # The phase currently being handled and the cancel scope of its handler task
+            active_handler: Optional[Tuple[PhaseData, trio.CancelScope]] = None
+            try:
+                await run_webdriver(driver.get, BASE_URL)  # Open the game website
 
                 # Proceed to join phase; if failed, stop the component and exit
-                if not await handle_join_phase(driver, roomcode, state.username):
+                if not await handle_join_phase(driver, roomcode, username):
                     await neuro_component.stop()
                     return
 
-                # Main loop: alternate between answer and vote phases
+                phase_handlers = {
+                    ANSWER_PANEL_ID: handle_answer_phase,
+                    VOTE_PANEL_ID: handle_voting_phase,
+                }
+
+                async def handle_phase(phase: PhaseData, task_status=trio.TASK_STATUS_IGNORED) -> None:
+                    nonlocal active_handler
+                    with trio.CancelScope() as scope:
+                        active_handler = (phase, scope)
+                        task_status.started()
+                        try:
+                            await phase_handlers[phase["id"]](driver, neuro_component, state, phase)
+                        finally:
+                            if active_handler is not None and active_handler[1] is scope:
+                                active_handler = None
+
+                # Main loop: drain the phase transitions pushed by the in-page observer and
+                # dispatch them to the answer and vote phases. The observer buffers transitions,
+                # so the poll interval backs off while the game is idle and resets after activity.
+                # Handlers run as separate tasks so the page keeps being watched while Neuro
+                # thinks, and a handler whose phase has moved on is cancelled.
+                poll_interval = MIN_PHASE_POLL_INTERVAL
                 while True:
-                    if await handle_answer_phase(driver, neuro_component, state):
-                        await trio.sleep(PAUSE_TIME)
-                        continue        
-                    
-                    if await handle_voting_phase(driver, neuro_component, state):
-                        await trio.sleep(PAUSE_TIME)
+                    try:
+                        phases = await run_webdriver(drain_phase_queue, driver)
+
+                        if phases is None:
+                            # First pass after joining, or the page was reloaded since the observer was installed
+                            await run_webdriver(driver.execute_script, INSTALL_PHASE_OBSERVER_JS, list(phase_handlers))
+                    except WebDriverException as e:
+                        # Usually the page is navigating or reloading; once it's back, the next drain
+                        # finds no observer and installs it again
+                        logger.warning("Reading the game phase failed: %s", e)
+                        phases = None
+
+                    if phases is not None:
+                        for phase in phases:
+                            if active_handler is not None:
+                                handled_phase, scope = active_handler
+                                if same_phase(handled_phase, phase):
+                                    continue  # The running handler is already dealing with this phase
+                                scope.cancel()
+                            await nursery.start(handle_phase, phase)
+
+                    if phases:
+                        poll_interval = MIN_PHASE_POLL_INTERVAL
+                    else:
+                        poll_interval = min(poll_interval * 2, MAX_PHASE_POLL_INTERVAL)
+
+                    await trio.sleep(poll_interval)
+            finally:
+                # Stop the handler still waiting on the page before the browser goes away
+                if active_handler is not None:
+                    active_handler[1].cancel()
+                # Close through the limiter so a WebDriver call still running in a cancelled
+                # handler's thread finishes first, shielded so this still happens during shutdown
+                with trio.CancelScope(shield=True):
+                    await run_webdriver(close_webdriver, driver, attach)
         except (KeyboardInterrupt, trio.Cancelled):
             logger.info("Shutting down...")
             return
@@ -439,7 +903,19 @@ async def run() -> None:
                 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Let Neuro play Quiplash 2 on jackbox.tv.")
+    parser.add_argument(
+        "--attach",
+        action="store_true",
+        help=f"attach to a Chrome already running with --remote-debugging-port={REMOTE_DEBUGGING_PORT} instead of launching one",
+    )
+    args = parser.parse_args()
+
     try:
-        trio.run(run)
-    except ExceptionGroup as exc:
-        traceback.print_exception(exc)
\ No newline at end of file
+        trio.run(run, args.attach, strict_exception_groups=True)
+    except BaseExceptionGroup as exc:
+        # A Ctrl+C that lands inside a nursery arrives wrapped in the group like any other
+        # error; it is a normal way to stop, so only report the rest
+        _, errors = exc.split(KeyboardInterrupt)
+        if errors is not None:
+            traceback.print_exception(errors)
\ No newline at end of file